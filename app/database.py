@@ -1,13 +1,169 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, text, make_url
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.orm import sessionmaker, declarative_base
 from dotenv import load_dotenv
-import os
+import os, threading, time, logging
 
 load_dotenv()  # loads .env
 
 SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL")
 
+# Optional read replicas, comma-separated (e.g. "sqlite:///./replica1.db,sqlite:///./replica2.db")
+READ_REPLICA_URLS       = [u.strip() for u in os.getenv("READ_REPLICA_URLS", "").split(",") if u.strip()]
+MAX_REPLICA_LAG         = float(os.getenv("MAX_REPLICA_LAG", "5"))          # seconds
+REPLICA_CHECK_SECONDS   = float(os.getenv("REPLICA_CHECK_SECONDS", "5"))    # re-check interval
+STICKY_PRIMARY_SECONDS  = float(os.getenv("STICKY_PRIMARY_SECONDS", "10"))  # reads after a write
+REPLICA_CONNECT_TIMEOUT = int(os.getenv("REPLICA_CONNECT_TIMEOUT", "2"))    # seconds, network backends
+
 engine = create_engine(SQLALCHEMY_DATABASE_URL, pool_pre_ping=True, echo=False, future=True)
-SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False)
 Base = declarative_base()        # ← new line
-SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False)
\ No newline at end of file
+SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+
+log = logging.getLogger(__name__)
+
+
+class _Replica:
+    def __init__(self, url: str):
+        # Keep a dead replica from stalling connects for the driver's default timeout
+        connect_args = {}
+        if make_url(url).get_backend_name() != "sqlite":
+            connect_args["connect_timeout"] = REPLICA_CONNECT_TIMEOUT
+        self.engine       = create_engine(url, pool_pre_ping=True, echo=False, future=True, connect_args=connect_args)
+        self.session      = sessionmaker(bind=self.engine, autocommit=False, autoflush=False)
+        self.healthy      = False
+        self._warned      = False   # log the first failure even if never healthy
+        self.url          = self.engine.url.render_as_string(hide_password=True)
+        event.listen(self.session, "do_orm_execute", self._fall_back_to_primary)
+
+    def check(self, max_lag: float):
+        """Refresh self.healthy: has our schema and (on MySQL) isn't lagging too far."""
+        try:
+            with self.engine.connect() as conn:
+                # A real table, not SELECT 1: a missing/empty SQLite copy must fail
+                conn.execute(text("SELECT 1 FROM weather_requests LIMIT 1"))
+                lag = _replica_lag(conn)
+            if lag > max_lag:
+                raise RuntimeError(f"{lag:.0f}s behind primary (MAX_REPLICA_LAG={max_lag:g})")
+        except Exception as e:
+            self.mark_unhealthy(e)
+        else:
+            if not self.healthy:
+                log.info("read replica %s is healthy", self.url)
+            self.healthy = True
+
+    def mark_unhealthy(self, reason):
+        if self.healthy or not self._warned:
+            log.warning("read replica %s unhealthy, reads go elsewhere: %s", self.url, reason)
+            self._warned = True
+        self.healthy = False
+
+    def _fall_back_to_primary(self, orm_execute_state):
+        # A replica that breaks between health checks: retry this query on the
+        # primary and keep further requests off the replica until it recovers.
+        try:
+            return orm_execute_state.invoke_statement()
+        except OperationalError as e:
+            self.mark_unhealthy(e)
+            return orm_execute_state.invoke_statement(bind_arguments={"bind": engine})
+
+
+def _replica_lag(conn) -> float:
+    """Seconds behind the primary; 0 for backends without replication status. Raises if unknown."""
+    if conn.dialect.name not in ("mysql", "mariadb"):
+        return 0.0
+    errors = []
+    for stmt, column in (("SHOW REPLICA STATUS", "Seconds_Behind_Source"),
+                         ("SHOW SLAVE STATUS",   "Seconds_Behind_Master")):
+        try:
+            row = conn.execute(text(stmt)).mappings().first()
+        except Exception as e:
+            errors.append(f"{stmt}: {e}")
+            continue
+        if row is None:
+            return 0.0  # not configured as a replica (e.g. a local copy for testing)
+        lag = row.get(column)
+        if lag is None:
+            raise RuntimeError(f"replication stopped ({column} is NULL)")
+        return float(lag)
+    raise RuntimeError(
+        "can't read replication lag; the replica user needs the REPLICATION CLIENT privilege ("
+        + "; ".join(errors) + ")"
+    )
+
+
+class ReadRouter:
+    """
+    Picks the session for read-only work.
+
+    Replicas are used round-robin; one that fails its health/lag check is
+    skipped until it passes again. Checks run on a background thread every
+    REPLICA_CHECK_SECONDS, so requests only read the last result and never
+    wait on a dead replica. Users who wrote within the last
+    STICKY_PRIMARY_SECONDS read from the primary so they see their own
+    changes. With no replicas (or none healthy) everything uses the primary.
+    """
+
+    def __init__(self, urls: list[str]):
+        self.replicas    = [_Replica(u) for u in urls]
+        self._next       = 0
+        self._last_write = {}   # user_id -> monotonic time of last commit
+        self._lock       = threading.Lock()
+        self._checker    = None
+
+    def mark_write(self, user_id: int | None):
+        if user_id is not None and self.replicas:
+            with self._lock:
+                self._last_write[user_id] = time.monotonic()
+
+    def _sticky(self, user_id: int | None) -> bool:
+        if user_id is None:
+            return False
+        with self._lock:
+            wrote_at = self._last_write.get(user_id)
+            if wrote_at is None:
+                return False
+            if time.monotonic() - wrote_at < STICKY_PRIMARY_SECONDS:
+                return True
+            del self._last_write[user_id]
+            return False
+
+    def _check_loop(self):
+        while True:
+            for replica in self.replicas:
+                replica.check(MAX_REPLICA_LAG)
+            time.sleep(REPLICA_CHECK_SECONDS)
+
+    def _pick(self) -> _Replica | None:
+        if not self.replicas:
+            return None
+        with self._lock:
+            # Started on first use so importing this module doesn't spawn a thread
+            if self._checker is None:
+                self._checker = threading.Thread(target=self._check_loop, name="replica-health", daemon=True)
+                self._checker.start()
+        for _ in range(len(self.replicas)):
+            with self._lock:
+                replica    = self.replicas[self._next % len(self.replicas)]
+                self._next += 1
+            if replica.healthy:
+                return replica
+        return None
+
+    def session(self, user_id: int | None = None):
+        replica = None if self._sticky(user_id) else self._pick()
+        return replica.session() if replica else SessionLocal()
+
+
+read_router = ReadRouter(READ_REPLICA_URLS)
+
+
+# Any commit on a primary session that flushed changes makes its user sticky.
+# get_db() stores the requesting user's id in session.info["user_id"].
+@event.listens_for(SessionLocal, "after_flush")
+def _note_write(session, flush_context):
+    session.info["wrote"] = True
+
+@event.listens_for(SessionLocal, "after_commit")
+def _stick_to_primary(session):
+    if session.info.pop("wrote", False):
+        read_router.mark_write(session.info.get("user_id"))
@@ -2,12 +2,37 @@
 
 from fastapi import Request, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from .database import SessionLocal
+from .database import SessionLocal, engine, read_router
 from . import auth, models
+from .write_behind import writer
 from jose.exceptions import JWTError
 
-def get_db():
+def _cookie_user_id(request: Request) -> int | None:
+    token = request.cookies.get("access_token")
+    if not token:
+        return None
+    try:
+        payload = auth.decode_token(token)
+        return int(payload.get("sub"))
+    except (JWTError, ValueError, TypeError):
+        return None
+
+def get_db(request: Request):
+    """Read-write session on the primary."""
     db = SessionLocal()
+    db.info["user_id"] = _cookie_user_id(request)  # lets commits mark the user sticky
+    try:
+        yield db
+    finally:
+        db.close()
+
+def get_read_db(request: Request):
+    """Read-only session: a healthy replica, or the primary right after this user wrote."""
+    user_id = _cookie_user_id(request)
+    # Queued write-behind writes must land (and mark the user sticky) before we pick
+    if writer and user_id is not None:
+        writer.wait_for_user(user_id)
+    db = read_router.session(user_id)
     try:
         yield db
     finally:
@@ -17,13 +42,26 @@ def get_current_user(
     request: Request,
     db:      Session = Depends(get_db)
 ) -> models.User | None:
-    token = request.cookies.get("access_token")
-    if not token:
+    user_id = _cookie_user_id(request)
+    if user_id is None:
         return None
-    try:
-        payload = auth.decode_token(token)
-        user_id = int(payload.get("sub"))
-    except (JWTError, ValueError):
+    # Read-your-writes: let this user's queued writes land before we read
+    if writer:
+        writer.wait_for_user(user_id)
+    user = db.query(models.User).get(user_id)
+    return user
+
+def get_read_user(
+    request: Request,
+    db:      Session = Depends(get_read_db)
+) -> models.User | None:
+    """get_current_user for read-only routes: loads the user on the handler's read session."""
+    user_id = _cookie_user_id(request)
+    if user_id is None:
         return None
     user = db.query(models.User).get(user_id)
+    if user is None and db.get_bind() is not engine:
+        # Replica may not have this (e.g. just-registered) user yet
+        with SessionLocal() as primary:
+            user = primary.query(models.User).get(user_id)
     return user
@@ -0,0 +1,213 @@
+# app/importer.py
+
+from pydantic import ValidationError
+from typing import AsyncIterator
+import codecs, csv, datetime, json, re
+
+from . import schemas
+
+MAX_ROW_BYTES = 1024 * 1024  # one saved lookup (incl. forecast JSON) is far smaller
+
+# csv's default 128 KiB field cap would reject rows MAX_ROW_BYTES allows
+csv.field_size_limit(max(csv.field_size_limit(), MAX_ROW_BYTES))
+
+_WS          = " \t\r\n"
+_SCALAR_END  = re.compile(r"[\s,\]}]")
+
+
+class MalformedImport(ValueError):
+    """The stream can't be parsed any further (no way to resync to the next row)."""
+
+
+# Each parser yields (row_number, dict) for rows it could read and
+# (row_number, Exception) for rows it couldn't, while holding at most
+# one partial row of text in memory.
+
+async def _text(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    try:
+        async for chunk in chunks:
+            text = decoder.decode(chunk)
+            if text:
+                yield text
+        tail = decoder.decode(b"", final=True)
+    except UnicodeDecodeError as e:
+        raise MalformedImport(f"body is not valid UTF-8: {e.reason}")
+    if tail:
+        yield tail
+
+
+async def _lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    buf = ""
+    async for text in _text(chunks):
+        buf += text
+        *complete, buf = buf.split("\n")
+        for line in complete:
+            yield line + "\n"
+        if len(buf) > MAX_ROW_BYTES:
+            raise MalformedImport(f"line longer than {MAX_ROW_BYTES} bytes")
+    if buf:
+        yield buf
+
+
+async def parse_ndjson(chunks: AsyncIterator[bytes]):
+    n = 0
+    async for line in _lines(chunks):
+        if not line.strip():
+            continue
+        n += 1
+        try:
+            obj = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield n, e
+            continue
+        yield n, obj if isinstance(obj, dict) else ValueError("row is not a JSON object")
+
+
+async def parse_csv(chunks: AsyncIterator[bytes]):
+    header = None
+    record = ""
+    n      = 0
+    async for line in _lines(chunks):
+        record += line
+        # A quoted field may span lines; the record is complete once quotes balance.
+        if record.count('"') % 2:
+            if len(record) > MAX_ROW_BYTES:
+                raise MalformedImport(f"row longer than {MAX_ROW_BYTES} bytes")
+            continue
+        try:
+            values = next(csv.reader([record]), [])
+        except csv.Error as e:
+            if header is None:
+                raise MalformedImport(f"bad CSV header: {e}")
+            n += 1
+            yield n, ValueError(f"bad CSV row: {e}")
+            continue
+        finally:
+            record = ""
+        if not values:
+            continue
+        if header is None:
+            header = values
+            continue
+        n += 1
+        if len(values) != len(header):
+            yield n, ValueError(f"expected {len(header)} columns, got {len(values)}")
+            continue
+        yield n, dict(zip(header, values))
+    if record.strip():
+        yield n + 1, ValueError("unterminated quoted field")
+
+
+async def parse_json(chunks: AsyncIterator[bytes]):
+    """Incrementally decode a top-level JSON array of objects, one element at a time."""
+    decoder = json.JSONDecoder()
+    stream  = _text(chunks)
+    buf     = ""
+    pos     = 0
+    n       = 0
+    eof     = False
+    # start -> "[" -> first -> row -> sep -> ("," -> row | "]" -> done)
+    state   = "start"
+
+    while True:
+        while pos < len(buf) and buf[pos] in _WS:
+            pos += 1
+        if pos < len(buf):
+            ch = buf[pos]
+            if state == "done":
+                raise MalformedImport("unexpected data after the JSON array")
+            if state == "start":
+                if ch != "[":
+                    raise MalformedImport("expected a JSON array")
+                state, pos = "first", pos + 1
+                continue
+            if state == "sep":
+                if ch == ",":
+                    state, pos = "row", pos + 1
+                elif ch == "]":
+                    state, pos = "done", pos + 1
+                else:
+                    raise MalformedImport(f"expected ',' or ']' after row {n}")
+                continue
+            # state is "first" or "row": a value is expected
+            if ch == "]" and state == "first":
+                state, pos = "done", pos + 1
+                continue
+            if ch in ",]":
+                raise MalformedImport(f"expected a value for row {n + 1}, got {ch!r}")
+            # A number/literal may continue in the next chunk; wait for its end
+            if ch in '{["' or eof or _SCALAR_END.search(buf, pos):
+                try:
+                    obj, end = decoder.raw_decode(buf, pos)
+                except json.JSONDecodeError as e:
+                    if eof:
+                        raise MalformedImport(f"row {n + 1}: {e.msg}")
+                    if len(buf) - pos > MAX_ROW_BYTES:
+                        raise MalformedImport(f"row {n + 1} longer than {MAX_ROW_BYTES} bytes")
+                else:
+                    n += 1
+                    yield n, obj if isinstance(obj, dict) else ValueError("row is not a JSON object")
+                    buf, pos, state = buf[end:], 0, "sep"
+                    continue
+        if eof:
+            if state == "done":
+                return
+            raise MalformedImport("unexpected end of JSON array")
+        try:
+            buf, pos = buf[pos:] + await stream.__anext__(), 0
+        except StopAsyncIteration:
+            eof = True
+
+
+PARSERS = {"json": parse_json, "ndjson": parse_ndjson, "csv": parse_csv}
+
+
+def _opt(value):
+    # CSV writes None as an empty cell
+    return value if value not in ("", None) else None
+
+
+def to_record_values(row: dict, user_id: int) -> dict:
+    """
+    Validate one exported row and return column values for WeatherRequest.
+    Raises ValueError/TypeError (incl. pydantic ValidationError) if the row is unusable.
+    """
+    payload = schemas.WeatherCreate(
+        location   = row.get("location"),
+        start_date = _opt(row.get("start_date")),
+        end_date   = _opt(row.get("end_date")),
+    )
+    location = payload.location.strip()
+    if not location:
+        raise ValueError("location is required")
+    if payload.start_date and payload.end_date and payload.start_date > payload.end_date:
+        raise ValueError("start_date must be on or before end_date")
+
+    response = row.get("response")
+    if not isinstance(response, str):
+        raise ValueError("response must be the stored JSON text")
+    try:
+        data = json.loads(response)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"response is not valid JSON: {e.msg}")
+    if not isinstance(data, dict):
+        raise ValueError("response is not a JSON object")
+
+    created_at = _opt(row.get("created_at"))
+    created_at = datetime.datetime.fromisoformat(created_at) if created_at else datetime.datetime.utcnow()
+
+    return {
+        "user_id":    user_id,
+        "location":   location,
+        "start_date": payload.start_date,
+        "end_date":   payload.end_date,
+        "response":   response,
+        "created_at": created_at,
+    }
+
+
+def describe(err: Exception) -> str:
+    if isinstance(err, ValidationError):
+        return "; ".join(f"{'.'.join(map(str, e['loc']))}: {e['msg']}" for e in err.errors())
+    return str(err)
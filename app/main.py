@@ -4,59 +4,59 @@ from fastapi import FastAPI, Depends, Request, Form, HTTPException, status
 from fastapi.responses import HTMLResponse, RedirectResponse, StreamingResponse, JSONResponse
 from fastapi.templating import Jinja2Templates
 from fastapi.staticfiles import StaticFiles
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
-import os, requests, json, datetime
+import os, requests, json, datetime, logging
 from typing import Optional
 import csv
 from io import StringIO
 
-from .database import SessionLocal, Base, engine
-from .dependencies import get_db, get_current_user
+from .database import Base, engine, read_router
+from .dependencies import get_db, get_read_db, get_current_user, get_read_user
 from .routers import users, weather
-from . import auth, models
-from jose.exceptions import JWTError
+from .write_behind import writer
+from . import auth, models, importer
 
 # Environment & API endpoints
 API_KEY      = os.getenv("OPENWEATHER_API_KEY")
 CURRENT_URL  = "https://api.openweathermap.org/data/2.5/weather"
 FORECAST_URL = "https://api.openweathermap.org/data/2.5/forecast"
 
+log = logging.getLogger(__name__)
+
+# Bulk import
+IMPORT_CHUNK_ROWS   = 500   # rows per INSERT/commit
+MAX_REPORTED_ERRORS = 100   # per-row errors echoed back (all are counted)
+
 # 1. Create tables
 Base.metadata.create_all(bind=engine)
 
 # 2. Init app
 app = FastAPI(title="Weather API")
 
+# Optional write-behind flusher: start with the app, drain on shutdown
+@app.on_event("startup")
+def start_write_behind():
+    if writer:
+        writer.start()
+
+@app.on_event("shutdown")
+def stop_write_behind():
+    if writer:
+        writer.stop()
+
 # 3. Templates & Static
 templates = Jinja2Templates(directory="app/templates")
 app.mount("/static", StaticFiles(directory="app/static"), name="static")
 
-# 4. DB dependency
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-# 5. Current user
-# Get current user from cookie
-def get_current_user(request: Request, db: Session = Depends(get_db)):
-    token = request.cookies.get("access_token")
-    if not token:
-        return None
-    try:
-        payload = auth.decode_token(token)
-        user_id = int(payload.get("sub"))
-    except (JWTError, ValueError):
-        return None
-    return db.query(models.User).get(user_id)
+# 4. DB sessions (get_db / get_read_db) & current user come from app.dependencies
 
 @app.get("/", response_class=HTMLResponse)
 def home(
     request: Request,
-    db:      Session     = Depends(get_db),
-    user:    models.User = Depends(get_current_user)
+    db:      Session     = Depends(get_read_db),
+    user:    models.User = Depends(get_read_user)
 ):
     # If not logged in, show the welcome/index page
     if not user:
@@ -185,8 +185,8 @@ def logout():
 @app.get("/history", response_class=HTMLResponse)
 def history_page(
     request: Request,
-    db:      Session     = Depends(get_db),
-    user:    models.User = Depends(get_current_user)
+    db:      Session     = Depends(get_read_db),
+    user:    models.User = Depends(get_read_user)
 ):
     # Aliased to home (same logic and template)
     if not user:
@@ -198,8 +198,8 @@ def history_page(
 def edit_page(
     weather_id: int,
     request:    Request,
-    db:         Session     = Depends(get_db),
-    user:       models.User = Depends(get_current_user)
+    db:         Session     = Depends(get_read_db),
+    user:       models.User = Depends(get_read_user)
 ):
     if not user:
         return RedirectResponse("/login", status_code=status.HTTP_303_SEE_OTHER)
@@ -265,7 +265,10 @@ def edit_submit(
         raise HTTPException(status_code=resp.status_code, detail="Failed to fetch updated weather")
 
     rec.response = resp.text
-    db.commit()
+    if writer:
+        writer.update(user.id, rec)
+    else:
+        db.commit()
     return RedirectResponse("/history", status_code=status.HTTP_303_SEE_OTHER)
 
 
@@ -282,15 +285,18 @@ def delete_entry(
     if not rec or rec.user_id != user.id:
         raise HTTPException(status_code=404, detail="Not found")
 
-    db.delete(rec)
-    db.commit()
+    if writer:
+        writer.delete(user.id, rec.id)
+    else:
+        db.delete(rec)
+        db.commit()
     return RedirectResponse("/history", status_code=status.HTTP_303_SEE_OTHER)
 
 @app.get("/export")
 def export_data(
     format: str = "json",
-    db: Session = Depends(get_db),
-    user: models.User = Depends(get_current_user)
+    db: Session = Depends(get_read_db),
+    user: models.User = Depends(get_read_user)
 ):
     if not user:
         raise HTTPException(status_code=401, detail="Not authenticated")
@@ -317,9 +323,88 @@ def export_data(
         writer.writerows(export_list)
         si.seek(0)
         return StreamingResponse(si, media_type="text/csv", headers={"Content-Disposition": "attachment; filename=weather_export.csv"})
+    elif format == "ndjson":
+        lines = (json.dumps(row) + "\n" for row in export_list)
+        return StreamingResponse(lines, media_type="application/x-ndjson", headers={"Content-Disposition": "attachment; filename=weather_export.ndjson"})
     else:
         return JSONResponse(export_list)
 
+@app.post("/import")
+async def import_data(
+    request: Request,
+    format:  str         = "json",
+    db:      Session     = Depends(get_db),
+    user:    models.User = Depends(get_current_user)
+):
+    """
+    Recreate saved lookups from an /export file sent as the raw request body
+    (json, ndjson or csv). The body is parsed as it streams in and rows are
+    inserted IMPORT_CHUNK_ROWS at a time; no weather API calls are made.
+    """
+    if not user:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    parser = importer.PARSERS.get(format)
+    if not parser:
+        raise HTTPException(status_code=400, detail="format must be json, ndjson or csv")
+
+    imported    = 0
+    error_count = 0
+    errors      = []
+    aborted     = None
+    status_code = 200
+    chunk       = []
+
+    def record_error(row_no, err):
+        nonlocal error_count
+        error_count += 1
+        if len(errors) < MAX_REPORTED_ERRORS:
+            errors.append({"row": row_no, "error": importer.describe(err)})
+
+    def save(rows):
+        try:
+            db.execute(insert(models.WeatherRequest), rows)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+
+    try:
+        async for row_no, row in parser(request.stream()):
+            if isinstance(row, Exception):
+                record_error(row_no, row)
+                continue
+            try:
+                chunk.append(importer.to_record_values(row, user.id))
+            except (ValueError, TypeError) as e:
+                record_error(row_no, e)
+                continue
+            if len(chunk) >= IMPORT_CHUNK_ROWS:
+                rows, chunk = chunk, []
+                await run_in_threadpool(save, rows)
+                imported += len(rows)
+    except importer.MalformedImport as e:
+        aborted, status_code = str(e), 400
+    except Exception:
+        # Earlier chunks are already committed; still tell the client how far we got
+        log.exception("import failed for user %s", user.id)
+        aborted, status_code = "unexpected error during import", 500
+
+    # Rows read before a fatal error are still kept
+    if chunk:
+        try:
+            await run_in_threadpool(save, chunk)
+            imported += len(chunk)
+        except Exception:
+            log.exception("import failed for user %s", user.id)
+            aborted, status_code = "unexpected error during import", 500
+    if imported:
+        read_router.mark_write(user.id)
+
+    return JSONResponse(
+        {"imported": imported, "error_count": error_count, "errors": errors, "aborted": aborted},
+        status_code=status_code,
+    )
+
 # 14. JSON API routers
 app.include_router(users.router)
 app.include_router(weather.router)
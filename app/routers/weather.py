@@ -2,9 +2,9 @@
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from ..database import SessionLocal
 from .. import models, schemas
-from ..dependencies import get_db, get_current_user
+from ..dependencies import get_db, get_read_db, get_current_user, get_read_user
+from ..write_behind import writer
 import requests, os
 import json
 from datetime import timedelta, datetime, date
@@ -73,6 +73,8 @@ def create_weather(
         end_date   = payload.end_date,
         response   = resp_text
     )
+    if writer:
+        return writer.insert(user.id, record)
     db.add(record)
     db.commit()
     db.refresh(record)
@@ -81,8 +83,8 @@ def create_weather(
 
 @router.get("/", response_model=list[schemas.WeatherOut])
 def read_all_weather(
-    db:   Session        = Depends(get_db),
-    user: models.User    = Depends(get_current_user),
+    db:   Session        = Depends(get_read_db),
+    user: models.User    = Depends(get_read_user),
 ):
     if not user:
         raise HTTPException(status_code=401, detail="Not authenticated")
@@ -96,8 +98,8 @@ def read_all_weather(
 @router.get("/{weather_id}", response_model=schemas.WeatherOut)
 def read_weather(
     weather_id: int,
-    db:         Session        = Depends(get_db),
-    user:       models.User    = Depends(get_current_user),
+    db:         Session        = Depends(get_read_db),
+    user:       models.User    = Depends(get_read_user),
 ):
     rec = db.get(models.WeatherRequest, weather_id)
     if not rec or rec.user_id != user.id:
@@ -131,6 +133,9 @@ def update_weather(
     if payload.end_date is not None:
         rec.end_date = payload.end_date
 
+    if writer:
+        writer.update(user.id, rec)
+        return rec
     db.commit()
     db.refresh(rec)
     return rec
@@ -145,6 +150,9 @@ def delete_weather(
     rec = db.get(models.WeatherRequest, weather_id)
     if not rec or rec.user_id != user.id:
         raise HTTPException(404, "Record not found")
+    if writer:
+        writer.delete(user.id, rec.id)
+        return
     db.delete(rec)
     db.commit()
 
@@ -152,8 +160,8 @@ def delete_weather(
 @router.get("/{weather_id}/forecast")
 def get_saved_forecast(
     weather_id: int,
-    db:         Session        = Depends(get_db),
-    user:       models.User    = Depends(get_current_user),
+    db:         Session        = Depends(get_read_db),
+    user:       models.User    = Depends(get_read_user),
 ):
     rec = db.get(models.WeatherRequest, weather_id)
     if not rec or rec.user_id != user.id:
@@ -169,8 +177,8 @@ def get_saved_forecast(
 @router.get("/{weather_id}/sun", response_model=schemas.SunTimes)
 def get_sun_times(
     weather_id: int,
-    db:         Session     = Depends(get_db),
-    user:       models.User = Depends(get_current_user),
+    db:         Session     = Depends(get_read_db),
+    user:       models.User = Depends(get_read_user),
 ):
     rec = db.get(models.WeatherRequest, weather_id)
     if not rec or rec.user_id != user.id:
@@ -0,0 +1,194 @@
+# app/write_behind.py
+
+from sqlalchemy import update, delete, inspect
+from concurrent.futures import Future
+from collections import Counter
+from dataclasses import dataclass, field
+from dotenv import load_dotenv
+import os, queue, threading, time, logging
+
+from .database import SessionLocal, read_router
+from . import models
+
+load_dotenv()
+WRITE_BEHIND  = os.getenv("WRITE_BEHIND", "").lower() in ("1", "true", "yes")
+BATCH_SIZE    = int(os.getenv("WRITE_BEHIND_BATCH_SIZE", "100"))
+MAX_DELAY_MS  = int(os.getenv("WRITE_BEHIND_MAX_DELAY_MS", "20"))
+LINGER_MS     = int(os.getenv("WRITE_BEHIND_LINGER_MS", "0"))
+
+_STOP = object()
+log   = logging.getLogger(__name__)
+
+
+@dataclass
+class _Op:
+    kind:      str                       # "insert" | "update" | "delete"
+    user_id:   int
+    record:    models.WeatherRequest | None = None
+    record_id: int | None                   = None
+    values:    dict                         = field(default_factory=dict)
+    future:    Future                       = field(default_factory=Future)
+
+
+class WriteBehind:
+    """
+    Groups WeatherRequest writes from many requests into one transaction.
+
+    A background thread takes whatever is queued and commits it in a single
+    transaction. It flushes as soon as the queue runs dry (optionally waiting
+    up to linger seconds for more), and never holds a batch open longer than
+    max_delay or past batch_size ops. Writes that arrive while a commit is
+    in progress form the next batch, so batches grow with load. Callers can wait_for_user() before reading to
+    see their own queued writes; stop() drains the queue before returning.
+    """
+
+    def __init__(self, session_factory, batch_size: int = BATCH_SIZE,
+                 max_delay: float = MAX_DELAY_MS / 1000, linger: float = LINGER_MS / 1000):
+        self._session_factory = session_factory
+        self._batch_size      = max(1, batch_size)
+        self._max_delay       = max_delay
+        self._linger          = min(linger, max_delay)
+        self._queue           = queue.Queue()
+        self._pending         = Counter()    # user_id -> queued ops not yet committed
+        self._cond            = threading.Condition()
+        self._closed          = False
+        self._thread          = None
+
+    # -- lifecycle ---------------------------------------------------------
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Refuse new writes, flush everything already queued, join the flusher."""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(_STOP)
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    # -- producers ---------------------------------------------------------
+
+    def insert(self, user_id: int, record: models.WeatherRequest) -> models.WeatherRequest:
+        """Queue a new record and block until its batch commits (id/created_at are needed)."""
+        return self._submit(_Op("insert", user_id, record=record)).result()
+
+    def update(self, user_id: int, record: models.WeatherRequest) -> Future:
+        """Queue the changed columns of a loaded record; returns without waiting."""
+        state  = inspect(record)
+        values = {
+            attr.key: attr.value
+            for attr in state.attrs
+            if attr.key in models.WeatherRequest.__table__.c and attr.history.has_changes()
+        }
+        return self._submit(_Op("update", user_id, record_id=record.id, values=values))
+
+    def delete(self, user_id: int, record_id: int) -> Future:
+        """Queue a delete; returns without waiting."""
+        return self._submit(_Op("delete", user_id, record_id=record_id))
+
+    def wait_for_user(self, user_id: int):
+        """Block until every write queued for this user has been committed."""
+        with self._cond:
+            while self._pending[user_id]:
+                self._cond.wait()
+
+    def _submit(self, op: _Op) -> Future:
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("write-behind queue is shut down")
+            # Normally started by the app's startup hook; start here too so a
+            # missed hook (lifespan off, bare TestClient) can't hang insert().
+            self.start()
+            self._pending[op.user_id] += 1
+            self._queue.put(op)
+        return op.future
+
+    # -- flusher -----------------------------------------------------------
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch = []
+            first = self._queue.get()
+            if first is _STOP:
+                return
+            batch.append(first)
+            deadline = time.monotonic() + self._max_delay
+            while len(batch) < self._batch_size:
+                # Don't wait out max_delay for callers that aren't coming:
+                # once the queue is empty, wait at most `linger` for more.
+                timeout = min(self._linger, deadline - time.monotonic())
+                try:
+                    op = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if op is _STOP:
+                    stopping = True
+                    break
+                batch.append(op)
+            self._flush(batch)
+
+    def _flush(self, batch: list[_Op]):
+        try:
+            try:
+                results = self._apply(batch)
+            except Exception:
+                # One bad row shouldn't fail everyone else in the batch:
+                # replay ops one at a time so each gets its own outcome.
+                log.warning("write-behind batch of %d failed; retrying one at a time", len(batch), exc_info=True)
+                for op in batch:
+                    try:
+                        op.future.set_result(self._apply([op])[0])
+                    except Exception as e:
+                        # Updates/deletes have already been answered, so this
+                        # log line is the only record that the write was lost.
+                        log.exception("write-behind %s failed (user_id=%s, record_id=%s)",
+                                      op.kind, op.user_id, op.record_id)
+                        op.future.set_exception(e)
+            else:
+                for op, result in zip(batch, results):
+                    op.future.set_result(result)
+        finally:
+            with self._cond:
+                for op in batch:
+                    read_router.mark_write(op.user_id)
+                    self._pending[op.user_id] -= 1
+                    if not self._pending[op.user_id]:
+                        del self._pending[op.user_id]
+                self._cond.notify_all()
+
+    def _apply(self, ops: list[_Op]) -> list:
+        inserts = [op.record for op in ops if op.kind == "insert"]
+        deletes = {op.record_id for op in ops if op.kind == "delete"}
+        updates = {}
+        for op in ops:
+            if op.kind == "update" and op.values and op.record_id not in deletes:
+                updates.setdefault(op.record_id, {}).update(op.values)
+
+        with self._session_factory(expire_on_commit=False) as db:
+            db.add_all(inserts)
+            if updates:
+                db.execute(
+                    update(models.WeatherRequest),
+                    [{"id": rid, **values} for rid, values in updates.items()],
+                )
+            if deletes:
+                db.execute(
+                    delete(models.WeatherRequest)
+                      .where(models.WeatherRequest.id.in_(deletes))
+                )
+            db.commit()
+            for rec in inserts:
+                db.expunge(rec)
+
+        return [op.record if op.kind == "insert" else None for op in ops]
+
+
+# Module-level writer; None unless WRITE_BEHIND is enabled in the environment.
+writer = WriteBehind(SessionLocal) if WRITE_BEHIND else None
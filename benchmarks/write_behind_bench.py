@@ -0,0 +1,89 @@
+# benchmarks/write_behind_bench.py
+"""
+Sustained WeatherRequest inserts/sec: commit-per-request vs write-behind.
+
+    python -m benchmarks.write_behind_bench                  # temp SQLite file
+    DATABASE_URL=mysql://... python -m benchmarks.write_behind_bench
+
+Each worker thread plays one request handler (FastAPI runs sync handlers
+in a thread pool), inserting one row per "request".
+"""
+
+import os, sys, tempfile, threading, time, argparse
+
+if not os.getenv("DATABASE_URL"):
+    _tmp = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+    os.environ["DATABASE_URL"] = f"sqlite:///{_tmp.name}"
+
+from app.database import SessionLocal, Base, engine
+from app.write_behind import WriteBehind
+from app import models
+
+RESPONSE = '{"name": "Bench", "main": {"temp": 70, "humidity": 40}, "weather": [{"description": "clear", "icon": "01d"}]}'
+
+
+def _record(user_id: int) -> models.WeatherRequest:
+    return models.WeatherRequest(user_id=user_id, location="Bench", response=RESPONSE)
+
+
+def commit_per_request(user_id: int):
+    db = SessionLocal()
+    try:
+        rec = _record(user_id)
+        db.add(rec)
+        db.commit()
+        db.refresh(rec)
+    finally:
+        db.close()
+
+
+def run(label: str, insert_one, user_id: int, threads: int, seconds: float):
+    done = [0] * threads
+    stop = time.monotonic() + seconds
+
+    def worker(i):
+        while time.monotonic() < stop:
+            insert_one(user_id)
+            done[i] += 1
+
+    pool = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    start = time.monotonic()
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    elapsed = time.monotonic() - start
+    total = sum(done)
+    print(f"{label:<22} {total:>8} rows  {total / elapsed:>10.1f} inserts/s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--threads",   type=int,   default=16)
+    parser.add_argument("--seconds",   type=float, default=5.0)
+    parser.add_argument("--batch",     type=int,   default=100)
+    parser.add_argument("--delay-ms",  type=int,   default=20)
+    parser.add_argument("--linger-ms", type=int,   default=0)
+    args = parser.parse_args(argv)
+
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        user = models.User(email=f"bench-{time.time_ns()}@example.com", hashed_pw="x")
+        db.add(user)
+        db.commit()
+        user_id = user.id
+
+    print(f"{engine.url.render_as_string(hide_password=True)}  threads={args.threads}  seconds={args.seconds}")
+    run("commit-per-request", commit_per_request, user_id, args.threads, args.seconds)
+
+    writer = WriteBehind(SessionLocal, batch_size=args.batch,
+                         max_delay=args.delay_ms / 1000, linger=args.linger_ms / 1000)
+    writer.start()
+    try:
+        run("write-behind", lambda uid: writer.insert(uid, _record(uid)), user_id, args.threads, args.seconds)
+    finally:
+        writer.stop()
+
+
+if __name__ == "__main__":
+    sys.exit(main())